@@ -2,6 +2,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import polars as pl
+import polars.selectors as cs
 import seaborn as sns
 
 # %%
@@ -71,10 +72,13 @@ pl_fixed_df.plot.line(x="Date", y="Berri 1")  # needs altair package
 fixed_df.plot(figsize=(15, 10))
 
 # TODO: how would you do this with a Polars data frame? With Polars data frames you might have to use the Seaborn library and it mmight not work out of the box as with pandas.
+# unpivot to long format (one row per date and bike path) so seaborn draws all lines in a single call.
+# The two empty "(données non disponibles)" columns are read as strings, so we only unpivot the numeric ones.
+pl_long_df = pl_fixed_df.unpivot(
+    on=cs.numeric(), index="Date", variable_name="path", value_name="count"
+)
 plt.figure(figsize=(12, 6))
-for col in pl_fixed_df.columns:
-    if col != "Date":
-        sns.lineplot(data=pl_fixed_df, x="Date", y=col, label=col)
+sns.lineplot(data=pl_long_df.to_pandas(), x="Date", y="count", hue="path")
 plt.tight_layout()
 plt.show()
 # %%
@@ -2,8 +2,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import polars as pl
+from pl_cache import pl_cached_parquet
 
 DATA_PATH = "../data/311-service-requests.csv"
+
 # %%
 # We're going to use a new dataset here, to demonstrate how to deal with larger datasets. This is a subset of the of 311 service requests from [NYC Open Data](https://nycopendata.socrata.com/Social-Services/311-Service-Requests-from-2010-to-Present/erm2-nwe9).
 # because of mixed types we specify dtype to prevent any errors
@@ -15,21 +17,23 @@ complaints.head()
 # Hint: we need the dtype argument reading all columns in as strings above in Pandas due to the zip code column containing NaNs as "NA" and some zip codes containing a dash like 1234-456
 # you cannot exactly do the same in Polars but you can read about some other solutions here:
 # see a discussion about dtype argument here: https://github.com/pola-rs/polars/issues/8230
-pl_complaints = pl.read_csv(DATA_PATH, infer_schema_length=0)
+# NOTE: pl_cached_parquet returns a LazyFrame: nothing is read until .collect(), so Polars only reads the columns we need
+pl_complaints = pl_cached_parquet(DATA_PATH, infer_schema_length=0)
+pl_complaints.head().collect()
 # %%
 # Selecting columns:
 complaints["Complaint Type"]
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_complaints.select(pl.col("Complaint Type"))
+pl_complaints.select(pl.col("Complaint Type")).collect()
 # %%
 # Get the first 5 rows of a dataframe
 complaints[:5]
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_complaints.head(5)
+pl_complaints.head(5).collect()
 
 # %%
 # Combine these to get the first 5 rows of a column:
@@ -37,7 +41,7 @@ complaints["Complaint Type"][:5]
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_complaints.select(pl.col("Complaint Type")).head(5)
+pl_complaints.select(pl.col("Complaint Type")).head(5).collect()
 
 # %%
 # Selecting multiple columns
@@ -45,9 +49,9 @@ complaints[["Complaint Type", "Borough"]]
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_complaints.select([pl.col("Complaint Type"), pl.col("Borough")])
+pl_complaints.select([pl.col("Complaint Type"), pl.col("Borough")]).collect()
 #or just:
-pl_complaints.select(["Complaint Type", "Borough"])
+pl_complaints.select(["Complaint Type", "Borough"]).collect()
 
 # %%
 # What's the most common complaint type?
@@ -57,11 +61,12 @@ complaint_counts[:10]
 # %%
 # TODO: rewrite the above using the polars library
 pl_most_complaints = (
-    pl_complaints.select(pl.col("Complaint Type"))
-    .to_series()
-    .value_counts()
-    .sort("count",descending=True)
+    pl_complaints.select("Complaint Type")
+    .group_by("Complaint Type")
+    .len()
+    .sort("len", descending=True)
     .head(10)
+    .collect()
 )
 
 # %%
@@ -76,4 +81,4 @@ plt.show()
 
 # %%
 # TODO: please do the same with Polars
-pl_most_complaints.plot.bar(x="Complaint Type", y="count")
\ No newline at end of file
+pl_most_complaints.plot.bar(x="Complaint Type", y="len")
\ No newline at end of file
@@ -2,6 +2,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import polars as pl
+from pl_cache import pl_cached_parquet
 
 
 # Make the graphs a bit prettier, and bigger
@@ -14,6 +15,7 @@ pd.set_option("display.width", 5000)
 pd.set_option("display.max_columns", 60)
 
 DATA_PATH = "../data/311-service-requests.csv"
+
 # %%
 # Let's continue with our NYC 311 service requests example.
 # because of mixed types we specify dtype to prevent any errors
@@ -21,7 +23,8 @@ complaints = pd.read_csv("../data/311-service-requests.csv", dtype="unicode")
 
 # %%
 # TODO: rewrite the above using the polars library (you might have to import it above) and call the data frame pl_complaints
-pl_complaints = pl.read_csv(DATA_PATH, infer_schema_length=0)
+# NOTE: pl_cached_parquet returns a LazyFrame, so filters and selections are pushed down into the parquet reader
+pl_complaints = pl_cached_parquet(DATA_PATH, infer_schema_length=0)
 # %%
 # 3.1 Selecting only noise complaints
 # I'd like to know which borough has the most noise complaints. First, we'll take a look at the data to see what it looks like:
@@ -29,7 +32,7 @@ complaints[:5]
 
 # %%
 # TODO: rewrite the above in polars
-pl_complaints.head(5)
+pl_complaints.head(5).collect()
 # %%
 # To get the noise complaints, we need to find the rows where the "Complaint Type" column is "Noise - Street/Sidewalk".
 noise_complaints = complaints[complaints["Complaint Type"] == "Noise - Street/Sidewalk"]
@@ -37,9 +40,9 @@ noise_complaints[:3]
 
 # %%
 # TODO: rewrite the above in polars
-pl_noise_complaints = pl_complaints.filter(
-    pl.col("Complaint Type") == "Noise - Street/Sidewalk"
-)
+# NOTE: the pl_ prefix keeps the expression safe from the pandas cells that reuse the name is_noise
+pl_is_noise = pl.col("Complaint Type") == "Noise - Street/Sidewalk"
+pl_noise_complaints = pl_complaints.filter(pl_is_noise)
 
 # %%
 # Combining more than one condition
@@ -50,9 +53,8 @@ complaints[is_noise & in_brooklyn][:5]
 # %%
 # TODO: rewrite the above using the Polars library. In polars these conditions are called Expressions.
 # Check out the Polars documentation for more info.
-is_noise = pl.col("Complaint Type") == "Noise - Street/Sidewalk"
-in_brooklyn = pl.col("Borough") == "BROOKLYN"
-pl_complaints.filter(is_noise & in_brooklyn).head(5)
+pl_in_brooklyn = pl.col("Borough") == "BROOKLYN"
+pl_complaints.filter(pl_is_noise & pl_in_brooklyn).head(5).collect()
 
 # %%
 # If we just wanted a few columns:
@@ -62,9 +64,9 @@ complaints[is_noise & in_brooklyn][
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_complaints.filter(is_noise & in_brooklyn).select(
+pl_complaints.filter(pl_is_noise & pl_in_brooklyn).select(
     ["Complaint Type", "Borough", "Created Date", "Descriptor"]
-).head(5)
+).head(5).collect()
 
 # %%
 # 3.3 So, which borough has the most noise complaints?
@@ -74,8 +76,7 @@ noise_complaints["Borough"].value_counts()
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_noise = pl_complaints.filter(is_noise)
-pl_noise.select(pl.col("Borough")).to_series().value_counts(sort=True)
+pl_noise_complaints.group_by("Borough").len().sort("len", descending=True).collect()
 
 # %%
 # What if we wanted to divide by the total number of complaints?
@@ -86,15 +87,14 @@ noise_complaint_counts / complaint_counts.astype(float)
 
 # %%
 # TODO: rewrite the above using the polars library
-pl_noise_complaints_counts = (
-    pl_noise.select(pl.col("Borough")).to_series().value_counts(sort=True)
-)
-pl_complaint_counts = (
-    pl_complaints.select(pl.col("Borough")).to_series().value_counts(sort=True)
-)
-pl_merged = pl_noise_complaints_counts.join(pl_complaint_counts, on="Borough")
-pl_merged = pl_merged.with_columns(
-    (pl.col("count") / pl.col("count_right")).alias("complaint_ratio")
+# NOTE: a single group_by counts both the noise complaints and all complaints, no join needed.
+# group_by returns the boroughs in random order, so we sort to get the same bars on every run
+pl_merged = (
+    pl_complaints.group_by("Borough")
+    .agg([pl_is_noise.sum().alias("noise"), pl.len().alias("total")])
+    .with_columns((pl.col("noise") / pl.col("total")).alias("complaint_ratio"))
+    .sort("complaint_ratio", descending=True)
+    .collect()
 )
 
 # %%
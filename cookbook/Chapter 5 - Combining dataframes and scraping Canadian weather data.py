@@ -1,8 +1,12 @@
 # %%
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import polars as pl
+import requests
 import seaborn as sns
 
 plt.style.use("ggplot")
@@ -20,7 +24,10 @@ weather_2012_final["temperature_c"].plot(figsize=(15, 6))
 plt.show()
 
 # TODO: rewrite using Polars
-pl_weather_2012_final = pl.read_csv(DATA_PATH, try_parse_dates=True)
+pl_weather_2012_final = pl.scan_csv(DATA_PATH, try_parse_dates=True)
+pl_weather_2012_final.select(["date_time", "temperature_c"]).collect().plot.line(
+    x="date_time", y="temperature_c"
+)
 
 # %%
 # Okay, let's start from the beginning.
@@ -58,10 +65,10 @@ weather_mar2012[:5]
 # This is much better now -- we only have columns with real data.
 
 # TODO: rewrite using Polars
+# null_count() counts the nulls of every column in a single pass
+null_counts = pl_weather_mar2012.null_count().row(0)
 null_columns = [
-    col
-    for col in pl_weather_mar2012.columns
-    if pl_weather_mar2012[col].null_count() > 0
+    col for col, nulls in zip(pl_weather_mar2012.columns, null_counts) if nulls > 0
 ]
 pl_weather_mar2012 = pl_weather_mar2012.drop(null_columns)
 
@@ -90,11 +97,12 @@ weather_mar2012.columns = weather_mar2012.columns.str.replace(
 )  # Remove the weird characters at the
 
 # TODO: rewrite using Polars
+# both replacements go into a single rename
 pl_weather_mar2012 = pl_weather_mar2012.rename(
-    {col: col.replace('ï»¿"', "") for col in pl_weather_mar2012.columns}
-)
-pl_weather_mar2012 = pl_weather_mar2012.rename(
-    {col: col.replace("Â", "") for col in pl_weather_mar2012.columns}
+    {
+        col: col.replace('ï»¿"', "").replace("Â", "")
+        for col in pl_weather_mar2012.columns
+    }
 )
 
 # %%
@@ -161,13 +169,13 @@ plt.show()
 # So it looks like the time with the highest median temperature is 2pm. Neat.
 
 # TODO: redo this using polars
-pl_temperatures = pl_weather_mar2012.select("temperature_c", "date_time")
-pl_temperatures.head()
-pl_temperatures = pl_temperatures.with_columns(
-    pl.col("date_time").dt.hour().alias("hour")
-)
-pl_temp_agg = pl_temperatures.group_by("hour").agg(
-    pl.col("temperature_c").median().alias("temperature_c")
+# we can group by an expression directly, no need to add an hour column first
+pl_temp_agg = (
+    pl_weather_mar2012.lazy()
+    .group_by(pl.col("date_time").dt.hour().alias("hour"))
+    .agg(pl.col("temperature_c").median())
+    .sort("hour")
+    .collect()
 )
 pl_temp_agg.plot.line(x="hour",y="temperature_c")
 # %%
@@ -212,38 +220,62 @@ def download_weather_month(year, month):
 
 # TODO: redefine these functions using polars and your code above
 def pl_download_weather_month(year, month):
+    # months we downloaded before are read from a local parquet cache instead
+    cache_path = f"../data/cache/{year}-{month:02d}.parquet"
+    if os.path.exists(cache_path):
+        return pl.scan_parquet(cache_path)
+
     url_template = "http://climate.weather.gc.ca/climate_data/bulk_data_e.html?format=csv&stationID=5415&Year={year}&Month={month}&timeframe=1&submit=Download+Data"
     url = url_template.format(year=year, month=month)
-    weather_data = pl.read_csv(url, try_parse_dates=True, null_values=[""])
+    response = requests.get(url)
+    response.raise_for_status()
+    weather_data = pl.read_csv(
+        io.BytesIO(response.content), try_parse_dates=True, null_values=[""]
+    )
     weather_data_clean = pl_clean_data(weather_data)
-    return weather_data_clean
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # write to a temporary file first, so an interrupted download never leaves a truncated cache behind
+    weather_data_clean.sink_parquet(cache_path + ".tmp", compression="zstd")
+    os.replace(cache_path + ".tmp", cache_path)
+    return pl.scan_parquet(cache_path)
+
+
+# defined once here instead of being rebuilt on every pl_clean_data call
+COLUMN_RENAMES = {
+    "Longitude (x)": "Longitude",
+    "Latitude (y)": "Latitude",
+    "Station Name": "Station_Name",
+    "Climate ID": "Climate_ID",
+    "Date/Time (LST)": "Date_Time",
+    "Temp (°C)": "Temperature_C",
+    "Dew Point Temp (°C)": "Dew_Point_Temp_C",
+    "Rel Hum (%)": "Relative_Humidity",
+    "Wind Spd (km/h)": "Wind_Speed_kmh",
+    "Visibility (km)": "Visibility_km",
+    "Stn Press (kPa)": "Station_Pressure_kPa",
+    "Weather": "Weather",
+}
 
 
 def pl_clean_data(data):
-    data = drop_null_columns(data)
+    # returns a LazyFrame, the caller decides when to collect
+    data = drop_null_columns(data).lazy()
     data = data.drop(["Year", "Month", "Day", "Time (LST)"])
     data = data.rename(
         {
-            "Longitude (x)": "Longitude",
-            "Latitude (y)": "Latitude",
-            "Station Name": "Station_Name",
-            "Climate ID": "Climate_ID",
-            "Date/Time (LST)": "Date_Time",
-            "Temp (°C)": "Temperature_C",
-            "Dew Point Temp (°C)": "Dew_Point_Temp_C",
-            "Rel Hum (%)": "Relative_Humidity",
-            "Wind Spd (km/h)": "Wind_Speed_kmh",
-            "Visibility (km)": "Visibility_km",
-            "Stn Press (kPa)": "Station_Pressure_kPa",
-            "Weather": "Weather",
+            col: col.replace('ï»¿"', "").replace("Â", "")
+            for col in data.collect_schema().names()
         }
     )
-    pl_weather_mar2012.columns = [col.lower() for col in pl_weather_mar2012.columns]
+    data = data.rename(COLUMN_RENAMES)
+    data = data.rename(str.lower)
     return data
 
 
 def drop_null_columns(data):
-    null_columns = [col for col in data.columns if data[col].null_count() > 0]
+    null_counts = data.null_count().row(0)
+    null_columns = [col for col, nulls in zip(data.columns, null_counts) if nulls > 0]
     data = data.drop(null_columns)
     return data
 
@@ -258,13 +290,20 @@ weather_2012 = pd.concat(data_by_month)
 weather_2012.head()
 
 # TODO: do the same with polars
-pl_data_by_month = [pl_download_weather_month(2012, i) for i in range(1, 13)]
-pl_weather_2012 = pl.concat(pl_data_by_month)
-pl_weather_2012.head()
+# the downloads are network bound, so we fetch all 12 months at the same time
+months = range(1, 13)
+with ThreadPoolExecutor(max_workers=len(months)) as executor:
+    pl_data_by_month = list(
+        executor.map(pl_download_weather_month, [2012] * len(months), months)
+    )
+# vertical_relaxed casts to a common supertype if a month was inferred with e.g. ints instead of floats
+pl_weather_2012 = pl.concat(pl_data_by_month, how="vertical_relaxed")
+pl_weather_2012.head().collect()
 
 # %%
 # Now, let's save the data.
 weather_2012.to_csv("../data/weather_2012.csv")
 
 # TODO: use polars to save the data.
-pl_weather_2012.write_csv("../data/pl_weather_2012.csv")
\ No newline at end of file
+# sink_csv streams the lazy result to disk without collecting the whole year first
+pl_weather_2012.sink_csv("../data/pl_weather_2012.csv")
\ No newline at end of file
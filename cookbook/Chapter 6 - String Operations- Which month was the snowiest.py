@@ -18,7 +18,8 @@ weather_2012 = pd.read_csv(
 weather_2012[:5]
 
 # TODO: load the data using polars and call the data frame pl_wather_2012
-pl_weather_2012 = pl.read_csv(DATA_PATH, try_parse_dates=True)
+pl_weather_2012 = pl.scan_csv(DATA_PATH, try_parse_dates=True)
+pl_weather_2012.head(5).collect()
 
 # %%
 # You'll see that the 'Weather' column has a text description of the weather that was going on each hour. We'll assume it's snowing if the text description contains "Snow".
@@ -35,8 +36,10 @@ plt.show()
 pl_weather_description = pl_weather_2012.with_columns(
     is_snowing=pl.col("weather").str.contains("Snow")
 )
-sns.barplot(pl_weather_description.to_pandas(), x="date_time", y="is_snowing")
-# or: sns.barplot(pl_weather_description.to_pandas(), x="date_time", y="is_snowing")  # requires pyarrow
+# pl_weather_description is a LazyFrame, so we collect it before handing it to seaborn
+sns.barplot(
+    pl_weather_description.collect().to_pandas(), x="date_time", y="is_snowing"
+)  # to_pandas requires pyarrow
 # %%
 # If we wanted the median temperature each month, we could use the `resample()` method like this:
 weather_2012["temperature_c"].resample("M").apply(np.median).plot(kind="bar")
@@ -45,9 +48,11 @@ plt.show()
 # Unsurprisingly, July and August are the warmest.
 
 # TODO: and now in Polars
-pl_weather_2012_monthly = pl_weather_2012.group_by_dynamic(
-    "date_time", every="1mo"
-).agg(pl.col("temperature_c").median())
+pl_weather_2012_monthly = (
+    pl_weather_2012.group_by_dynamic("date_time", every="1mo")
+    .agg(pl.col("temperature_c").median())
+    .collect()
+)
 pl_weather_2012_monthly.head()
 
 pl_weather_2012_monthly.plot.bar(x="date_time", y="temperature_c")
@@ -63,9 +68,13 @@ plt.show()
 # So now we know! In 2012, December was the snowiest month. Also, this graph suggests something that I feel -- it starts snowing pretty abruptly in November, and then tapers off slowly and takes a long time to stop, with the last snow usually being in April or May.
 
 # TODO: please do the same in Polars
-pl_weather_description = pl_weather_description.group_by_dynamic(
-    "date_time", every="1mo"
-).agg(pl.col("is_snowing").mean())
-pl_weather_description.head()
+# the snow check goes straight into the aggregation, so no is_snowing column is materialized.
+# The mean of a boolean column is the share of True values, no cast needed.
+pl_monthly_snow = (
+    pl_weather_2012.group_by_dynamic("date_time", every="1mo", closed="left")
+    .agg(pl.col("weather").str.contains("Snow").mean().alias("is_snowing"))
+    .collect()
+)
+pl_monthly_snow.head()
 
-pl_weather_description.plot.bar(x="date_time", y="is_snowing")
+pl_monthly_snow.plot.bar(x="date_time", y="is_snowing")
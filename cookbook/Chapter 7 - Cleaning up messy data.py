@@ -4,6 +4,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import polars as pl
+from pl_cache import pl_cached_parquet
 
 # Make the graphs a bit prettier, and bigger
 plt.style.use("ggplot")
@@ -19,7 +20,8 @@ requests = pd.read_csv("../data/311-service-requests.csv", dtype="unicode")
 requests.head()
 
 # TODO: load the data with Polars
-pl_requests = pl.read_csv(DATA_PATH, infer_schema_length=0)
+# NOTE: pl_cached_parquet returns a LazyFrame, we only read the data once we call .collect()
+pl_requests = pl_cached_parquet(DATA_PATH, infer_schema_length=0)
 
 # %%
 # How to know if your data is messy?
@@ -45,7 +47,7 @@ pl_requests = pl.read_csv(DATA_PATH, infer_schema_length=0)
 requests["Incident Zip"].unique()
 
 # TODO: what's the Polars command for this?
-pl_requests.select("Incident Zip").unique()
+pl_requests.select("Incident Zip").unique().collect()
 
 # %%
 # Fixing the nan values and string/float confusion
@@ -57,10 +59,14 @@ requests = pd.read_csv(
 requests["Incident Zip"].unique()
 
 # TODO: please implement this with Polars
-pl_requests = pl.read_csv(
-    DATA_PATH, null_values=na_values, dtypes={"Incident Zip": str}
+# NOTE: only Incident Zip is forced to a string, the other columns get their numeric types inferred
+pl_requests = pl.scan_csv(
+    DATA_PATH,
+    infer_schema_length=10_000,
+    schema_overrides={"Incident Zip": pl.Utf8},
+    null_values=na_values,
 )
-pl_requests.select("Incident Zip").unique()
+pl_requests.select("Incident Zip").unique().collect()
 
 # %%
 # What's up with the dashes?
@@ -87,7 +93,7 @@ requests["Incident Zip"] = requests["Incident Zip"].str.slice(0, 5)
 # TODO: please implement this with Polars
 pl_requests.filter(pl.col("Incident Zip").str.len_chars() > 5).select(
     "Incident Zip"
-).unique()
+).unique().collect()
 pl_requests = pl_requests.with_columns(pl.col("Incident Zip").str.slice(0, 5))
 
 # %%
@@ -98,7 +104,7 @@ zero_zips = requests["Incident Zip"] == "00000"
 requests.loc[zero_zips, "Incident Zip"] = np.nan
 
 # TODO: please implement this with Polars
-pl_requests.filter(pl.col("Incident Zip") == "00000")
+pl_requests.filter(pl.col("Incident Zip") == "00000").collect()
 pl_requests = pl_requests.with_columns(
     pl.when(pl.col("Incident Zip") == "00000")
     .then(None)
@@ -117,10 +123,14 @@ unique_zips
 # Amazing! This is much cleaner.
 
 # TODO: please implement this with Polars
+# unlike pandas we don't need to fill the nulls first: unique() keeps null as its own value
 pl_unique_zips = (
-    pl_requests.select("Incident Zip").fill_null("NA").cast(pl.Utf8).unique()
+    pl_requests.select("Incident Zip")
+    .unique()
+    .sort("Incident Zip", nulls_last=True)
+    .collect()
 )
-pl_unique_zips.sort("Incident Zip")
+pl_unique_zips
 
 # %%
 # There's something a bit weird here, though -- I looked up 77056 on Google maps, and that's in Texas.
@@ -137,7 +147,7 @@ pl_is_close = (pl.col("Incident Zip").str.starts_with("0")) | (
     pl.col("Incident Zip").str.starts_with("1")
 )
 pl_is_far = ~pl_is_close & (pl.col("Incident Zip").is_not_null())
-pl_requests.filter(pl_is_far).select("Incident Zip")
+pl_requests.filter(pl_is_far).select("Incident Zip").collect()
 
 # %%
 requests[is_far][["Incident Zip", "Descriptor", "City"]].sort_values("Incident Zip")
@@ -146,7 +156,7 @@ requests[is_far][["Incident Zip", "Descriptor", "City"]].sort_values("Incident Z
 # TODO: please implement this with Polars
 pl_requests.filter(pl_is_far).select(["Incident Zip", "Descriptor", "City"]).sort(
     "Incident Zip"
-)
+).collect()
 
 # %%
 # Filtering by zip code is probably a bad way to handle this -- we should really be looking at the city instead.
@@ -155,9 +165,9 @@ requests["City"].str.upper().value_counts()
 # It looks like these are legitimate complaints, so we'll just leave them alone.
 
 # TODO: please implement this with Polars
-pl_requests.with_columns(pl.col("City").str.to_uppercase()).select(
-    pl.col("City").value_counts()
-)
+pl_requests.group_by(pl.col("City").str.to_uppercase()).len().sort(
+    "len", descending=True
+).collect()
 
 # %%
 # Let's turn this analysis into a function putting it all together:
@@ -184,17 +194,24 @@ requests["Incident Zip"].unique()
 
 # TODO: please implement this with Polars
 def pl_fix_zip_codes(data, zip_column):
-    slicer = pl.col(zip_column).str.slice(0, 5)
-    condition = pl.when(pl.col(zip_column) == "00000").then(None).otherwise(zip_column)
-    data = data.with_columns(zip_column=slicer).with_columns(zip_column=condition)
+    # Truncate everything to length 5
+    zips = pl.col(zip_column).str.slice(0, 5)
+
+    # Set 00000 zip codes to null, in the same with_columns call as the truncation
+    data = data.with_columns(
+        pl.when(zips == "00000").then(None).otherwise(zips).alias(zip_column)
+    )
     return data
 
 
-pl_requests = pl.read_csv(
-    DATA_PATH, null_values=na_values, dtypes={"Incident Zip": str}
+pl_requests = pl.scan_csv(
+    DATA_PATH,
+    infer_schema_length=10_000,
+    schema_overrides={"Incident Zip": pl.Utf8},
+    null_values=na_values,
 )
 
 pl_requests = pl_fix_zip_codes(pl_requests, "Incident Zip")
-pl_requests.select("Incident Zip").unique()
+pl_requests.select("Incident Zip").unique().collect()
 
 # %%
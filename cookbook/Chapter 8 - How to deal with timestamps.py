@@ -1,79 +1,99 @@
 # %%
-from os import sep
+import os
 import pandas as pd
+from IPython.display import display
 import polars as pl
+from pl_cache import pl_cached_parquet
 
 DATA_PATH = "../data/popularity-contest"
 
+# The pandas version is only here for comparison and doubles the run time, set RUN_PANDAS_BASELINE=1 to run it too.
+# Its results are shown with display(), a bare expression inside the `if` blocks would not be shown.
+RUN_PANDAS_BASELINE = os.environ.get("RUN_PANDAS_BASELINE", "0") == "1"
+
 # %%
 # Parsing Unix timestamps
 # It's not obvious how to deal with Unix timestamps in pandas -- it took me quite a while to figure this out. The file we're using here is a popularity-contest file of packages.
 
 # Read it, and remove the last row
-popcon = pd.read_csv(
-    "../data/popularity-contest",
-    sep=" ",
-)[:-1]
-popcon.columns = ["atime", "ctime", "package-name", "mru-program", "tag"]
-popcon[:5]
+if RUN_PANDAS_BASELINE:
+    popcon = pd.read_csv(
+        "../data/popularity-contest",
+        sep=" ",
+        header=0,
+        names=["atime", "ctime", "package-name", "mru-program", "tag"],
+    )[:-1]
+    display(popcon[:5])
 
 # TODO: please reimplement this using Polars
-pl_popcon = pl.read_csv(DATA_PATH, separator=" ", infer_schema=0)[:-1]
-# NOTE: or you can do this: 
-nr_rows = (
-    pl.scan_csv(DATA_PATH, separator=" ", infer_schema=0)
-    .select(pl.len())
-    .collect()
-    .item()
+# NOTE: pl_cached_parquet returns a LazyFrame, so the filters further down are pushed into the parquet reader.
+# The last row is an "END-POPULARITY-CONTEST-0 ..." trailer, comment_prefix skips it while parsing,
+# and new_columns names the columns right away.
+# The timestamps are parsed straight into Int64 with schema_overrides, everything else stays a string.
+pl_popcon = pl_cached_parquet(
+    DATA_PATH,
+    separator=" ",
+    infer_schema=0,
+    comment_prefix="END-POPULARITY-CONTEST",
+    new_columns=["atime", "ctime", "package-name", "mru-program", "tag"],
+    schema_overrides={"atime": pl.Int64, "ctime": pl.Int64},
 )
-pl_popcon = pl.read_csv(DATA_PATH, separator=" ", infer_schema=0, n_rows=(nr_rows - 1))
-
-pl_popcon.columns = ["atime", "ctime", "package-name", "mru-program", "tag"]
-pl_popcon.head(5)
+pl_popcon.head(5).collect(engine="streaming")
 
 # %%
 # The magical part about parsing timestamps in pandas is that numpy datetimes are already stored as Unix timestamps. So all we need to do is tell pandas that these integers are actually datetimes -- it doesn't need to do any conversion at all.
 # We need to convert these to ints to start:
-popcon["atime"] = popcon["atime"].astype(int)
-popcon["ctime"] = popcon["ctime"].astype(int)
+if RUN_PANDAS_BASELINE:
+    popcon["atime"] = popcon["atime"].astype(int)
+    popcon["ctime"] = popcon["ctime"].astype(int)
 
 # TODO: please reimplement this using Polars
-pl_popcon = pl_popcon.with_columns(
-    pl.col("atime").cast(pl.Int64),
-    pl.col("ctime").cast(pl.Int64),
-)
+# NOTE: nothing to do here, atime and ctime are already read as Int64 thanks to schema_overrides above.
 
 # %%
 # Every numpy array and pandas series has a dtype -- this is usually `int64`, `float64`, or `object`. Some of the time types available are `datetime64[s]`, `datetime64[ms]`, and `datetime64[us]`. There are also `timedelta` types, similarly.
 # We can use the `pd.to_datetime` function to convert our integer timestamps into datetimes. This is a constant-time operation -- we're not actually changing any of the data, just how pandas thinks about it.
 
-popcon["atime"] = pd.to_datetime(popcon["atime"], unit="s")
-popcon["ctime"] = pd.to_datetime(popcon["ctime"], unit="s")
-popcon.head()
+if RUN_PANDAS_BASELINE:
+    popcon["atime"] = pd.to_datetime(popcon["atime"], unit="s")
+    popcon["ctime"] = pd.to_datetime(popcon["ctime"], unit="s")
+    display(popcon.head())
 
 # TODO: please reimplement this using Polars
-# convert to milliseconds
-pl_popcon = pl_popcon.with_columns(
-    pl.col("atime") * 1000,
-    pl.col("ctime") * 1000,
-)
-pl_popcon = pl_popcon.with_columns(
-    pl.col("atime").cast(pl.Datetime("ms")),
-    pl.col("ctime").cast(pl.Datetime("ms")),
+# from_epoch reads the ints as seconds since 1970 directly, no need to convert to milliseconds first.
+# The timestamp 0 rows we drop further down are filtered out here already, while atime is still a plain
+# Int64: a cheap int compare, and the discarded rows never go through the conversion.
+pl_popcon = pl_popcon.filter(pl.col("atime") > 0).with_columns(
+    pl.from_epoch("atime", time_unit="s"),
+    pl.from_epoch("ctime", time_unit="s"),
 )
 
 # %%
 # Now suppose we want to look at all packages that aren't libraries.
 
 # First, I want to get rid of everything with timestamp 0. Notice how we can just use a string in this comparison, even though it's actually a timestamp on the inside? That is because pandas is amazing.
-popcon = popcon[popcon["atime"] > "1970-01-01"]
+# The string works, but a ready-made pd.Timestamp saves pandas from parsing it before comparing.
+if RUN_PANDAS_BASELINE:
+    epoch = pd.Timestamp("1970-01-01")
+    popcon = popcon[popcon["atime"] > epoch]
 
 # Now we can use pandas' magical string abilities to just look at rows where the package name doesn't contain 'lib'.
-nonlibraries = popcon[~popcon["package-name"].str.contains("lib")]
-nonlibraries.sort_values("ctime", ascending=False)[:10]
+if RUN_PANDAS_BASELINE:
+    nonlibraries = popcon[~popcon["package-name"].str.contains("lib")]
+    # nlargest only keeps the 10 newest rows instead of sorting all of them
+    display(nonlibraries.nlargest(10, "ctime"))
 
 # TODO: please reimplement this using Polars
-pl_popcon = pl_popcon.filter(pl.col("atime") > pl.datetime(year=1970, month=1, day=1))
-pl_nonlibraries = pl_popcon.filter(~pl.col("package-name").str.contains("lib"))
+# we only need three columns, Polars pushes this selection down so the other two are never parsed
+pl_nonlibraries = (
+    pl_popcon.select(["atime", "ctime", "package-name"])
+    # the timestamp 0 rows are already gone, see the from_epoch cell above.
+    # NOTE: the optimizer fuses that atime filter and this one into a single predicate inside the
+    # parquet scan, call .explain() on the query before .collect() to see the plan
+    .filter(~pl.col("package-name").str.contains("lib", literal=True))
+    # the streaming engine scans, filters and converts the data batch by batch instead of one step at a time
+    .collect(engine="streaming")
+)
+pl_nonlibraries.top_k(10, by="ctime")
 
 # The whole message here is that if you have a timestamp in seconds or milliseconds or nanoseconds, then you can just "cast" it to a `'datetime64[the-right-thing]'` and pandas/numpy will take care of the rest.
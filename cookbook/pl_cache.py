@@ -0,0 +1,21 @@
+import hashlib
+import os
+
+import polars as pl
+
+
+def pl_cached_parquet(csv_path, **kwargs):
+    # parse the csv only once and scan the (much faster) parquet copy on every later run.
+    # The reader arguments decide the schema of the copy, so they are part of its file name,
+    # and the copy is rebuilt when the csv was modified after it was written.
+    key = hashlib.sha1(repr(sorted(kwargs.items())).encode()).hexdigest()[:8]
+    parquet_path = f"{csv_path}.{key}.parquet"
+    if not os.path.exists(parquet_path) or os.path.getmtime(
+        parquet_path
+    ) < os.path.getmtime(csv_path):
+        # write to a temporary file first, so an interrupted run never leaves a truncated cache behind
+        pl.scan_csv(csv_path, **kwargs).sink_parquet(
+            parquet_path + ".tmp", compression="zstd"
+        )
+        os.replace(parquet_path + ".tmp", parquet_path)
+    return pl.scan_parquet(parquet_path)